@@ -8,3 +8,12 @@ class SendMessageError(Exception):
 
 class StatusError(Exception):
     pass
+
+
+class MissingKeysError(KeyError):
+    def __str__(self):
+        return Exception.__str__(self)
+
+
+class BotStopped(BaseException):
+    pass
@@ -1,21 +1,44 @@
 import os
 import sys
 import time
+import hashlib
 import logging
+import signal
+import threading
 import requests
 import telegram.ext
-from json import JSONDecodeError
+from collections import Counter, OrderedDict
 from dotenv import load_dotenv
+from functools import lru_cache
 from http import HTTPStatus
-from exceptions import ApiAnswerError, SendMessageError, StatusError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from exceptions import (
+    ApiAnswerError, BotStopped, MissingKeysError, SendMessageError,
+    StatusError,
+)
+
+try:
+    from orjson import JSONDecodeError, loads as json_loads
+except ImportError:
+    from json import JSONDecodeError, loads as json_loads
 
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TOKENS_ERROR = (
+    'Отсутствуют обязательные переменные окружения: {}. '
+    'программа принудительно остановлена!'
+)
 
-RETRY_TIME = 600
+RETRY_TIME = 60
+RECENT_MAX = 32
+SUPPRESS_WINDOW = 3600
+SEND_INTERVAL = 1
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 15
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -24,6 +47,29 @@ HOMEWORK_STATUSES = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+_MISSING = object()
+
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=1,
+    pool_block=True,
+    max_retries=Retry(
+        total=2,
+        read=False,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    ),
+))
+
+api_cache = {'from_date': None, 'etag': None, 'response': None}
+api_status_counter = Counter()
+stop_event = threading.Event()
+
+REQUIRED_RESPONSE_KEYS = frozenset(('homeworks', 'current_date'))
+REQUIRED_HW_KEYS = frozenset(('homework_name', 'status'))
 
 logger = logging.getLogger(__name__)
 
@@ -32,32 +78,79 @@ def send_message(bot: telegram.Bot, message: str) -> None:
     """Отправляет сообщение в Telegram чат."""
     try:
         bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-        logger.info(f'Бот отправил сообщение "{message}"')
+        logger.info('Бот отправил сообщение "%s"', message)
     except Exception as err:
         raise SendMessageError('Ошибка при отправке сообщения') from err
 
 
+def send_error_message(bot: telegram.Bot, message: str,
+                       recent: OrderedDict) -> None:
+    """Отправляет сообщение об ошибке не чаще раза в SUPPRESS_WINDOW."""
+    key = hashlib.blake2b(message.encode(), digest_size=8).digest()
+    now = time.monotonic()
+    while recent and now - next(iter(recent.values())) >= SUPPRESS_WINDOW:
+        recent.popitem(last=False)
+    if key in recent:
+        return
+    try:
+        send_message(bot, message)
+    except SendMessageError as err:
+        logger.error('%s: %s', err, err.__cause__)
+        return
+    recent[key] = now
+    if len(recent) > RECENT_MAX:
+        recent.popitem(last=False)
+
+
+def report_error(bot: telegram.Bot, err: Exception,
+                 recent: OrderedDict) -> None:
+    """Логирует ошибку и сообщает о ней в Telegram."""
+    message = f'Сбой в работе программы: {err}'
+    logger.error(message)
+    send_error_message(bot, message, recent)
+
+
 def get_api_answer(current_timestamp: int) -> dict:
     """Делает запрос к эндпоинту API-сервиса."""
     try:
         timestamp = current_timestamp or int(time.time())
         params = {'from_date': timestamp}
-        logger.info(f'Запрос к API. Эндпоинт: {ENDPOINT}. headers: {HEADERS}')
-        response = requests.get(
+        logger.info('Запрос к API. Эндпоинт: %s', ENDPOINT)
+        headers = HEADERS
+        if api_cache['etag'] and api_cache['from_date'] == timestamp:
+            headers = {**HEADERS, 'If-None-Match': api_cache['etag']}
+        response = SESSION.get(
             ENDPOINT,
-            headers=HEADERS,
+            headers=headers,
             params=params,
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
         )
+        api_status_counter[response.status_code] += 1
+        logger.debug('Коды ответов API: %s', api_status_counter)
+        if (response.status_code == HTTPStatus.NOT_MODIFIED
+                and headers is not HEADERS):
+            logger.info('Ответ API не изменился')
+            return api_cache['response']
         if response.status_code != HTTPStatus.OK:
             raise ApiAnswerError(
                 f'Эндпоинт {ENDPOINT} недоступен. '
-                f'Код ответа API: {response.status_code} '
-                f'headers: {HEADERS}'
+                f'Код ответа API: {response.status_code}'
             )
-        homework_statuses = response.json()
+        homework_statuses = json_loads(response.content)
+        api_cache.update(
+            from_date=timestamp,
+            etag=response.headers.get('ETag'),
+            response=homework_statuses,
+        )
         logger.info('Запрос к API успешно завершен')
+    except requests.exceptions.Timeout as err:
+        raise ApiAnswerError(
+            f'Превышено время ожидания ответа от эндпоинта {ENDPOINT}'
+        ) from err
     except (JSONDecodeError, ValueError) as err:
         raise ValueError('Ошибка при декодирование json') from err
+    except ApiAnswerError:
+        raise
     except Exception as err:
         raise ApiAnswerError(f'Эндпоинт {ENDPOINT} недоступен.') from err
     return homework_statuses
@@ -67,8 +160,11 @@ def check_response(response: dict) -> list:
     """Проверяет ответ API на корректность."""
     if not isinstance(response, dict):
         raise TypeError(f'Нверный тип данных ответа: {type(response)} != dict')
-    if not all(key in response for key in ('homeworks', 'current_date')):
-        raise KeyError('Отсутствуют ключи от API')
+    missing = REQUIRED_RESPONSE_KEYS - response.keys()
+    if missing:
+        raise MissingKeysError(
+            f'Отсутствуют ключи от API: {", ".join(sorted(missing))}'
+        )
     homeworks = response.get('homeworks')
     if not isinstance(homeworks, list):
         raise TypeError(f'Нверный тип данных ДЗ: {type(response)} != list')
@@ -76,67 +172,124 @@ def check_response(response: dict) -> list:
     return homeworks
 
 
+@lru_cache(maxsize=128)
+def format_status(homework_name: str, verdict: str) -> str:
+    """Формирует сообщение об изменении статуса работы."""
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
 def parse_status(homework: dict) -> str:
     """Извлекает из домашней работе статус этой работы."""
     if not isinstance(homework, dict):
         raise TypeError(f'Нверный тип данных ДЗ: {type(homework)} != dict')
-    if not all(key in homework for key in ('homework_name', 'status')):
-        raise KeyError('Отсутствуют ключи от последней работы')
+    missing = REQUIRED_HW_KEYS - homework.keys()
+    if missing:
+        raise MissingKeysError(
+            'Отсутствуют ключи от последней работы: '
+            f'{", ".join(sorted(missing))}'
+        )
     homework_name = homework.get('homework_name')
     homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_STATUSES:
+    verdict = HOMEWORK_STATUSES.get(homework_status, _MISSING)
+    if verdict is _MISSING:
         raise StatusError(
             f'Недокументированный статус домашней работы {homework_status}'
         )
-    verdict = HOMEWORK_STATUSES.get(homework_status)
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return format_status(homework_name, verdict)
+
+
+def missing_tokens() -> list:
+    """Возвращает имена незаданных переменных окружения."""
+    tokens = (
+        ('PRACTICUM_TOKEN', PRACTICUM_TOKEN),
+        ('TELEGRAM_TOKEN', TELEGRAM_TOKEN),
+        ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID),
+    )
+    return [name for name, token in tokens if not token]
+
+
+def validate_env() -> tuple:
+    """Проверяет переменные окружения и формирует сообщение об ошибке."""
+    missing = missing_tokens()
+    if missing:
+        return False, TOKENS_ERROR.format(', '.join(missing))
+    return True, ''
 
 
 def check_tokens() -> bool:
     """Проверяет доступность переменных окружения."""
-    return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
+    return not missing_tokens()
 
 
-def error_tokens_message() -> str:
-    """Возвращает сообщение для ошибки остутствия переменных окружения."""
-    message = 'Отсутствуют обязательные переменные окружения: '
-    for token_name, token in {'PRACTICUM_TOKEN': PRACTICUM_TOKEN,
-                              'TELEGRAM_TOKEN': TELEGRAM_TOKEN,
-                              'TELEGRAM_CHAT_ID': TELEGRAM_CHAT_ID}.items():
-        if not token:
-            message += f'{token_name}, '
-    return message + 'программа принудительно остановлена!'
+def send_statuses(bot: telegram.Bot, homeworks: list, delivered: set,
+                  recent_errors: OrderedDict) -> None:
+    """Отправляет статусы работ, пропуская уже доставленные."""
+    for homework in reversed(homeworks):
+        try:
+            status = parse_status(homework)
+        except (TypeError, KeyError, StatusError) as err:
+            report_error(bot, err, recent_errors)
+            continue
+        key = (status, homework.get('date_updated'))
+        if key in delivered:
+            continue
+        send_message(bot, status)
+        delivered.add(key)
+        stop_event.wait(SEND_INTERVAL)
 
 
-def main() -> None:
-    """Основная логика работы бота."""
-    if not check_tokens():
-        message = error_tokens_message()
-        logger.critical(message)
-        sys.exit()
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
+def stop(signum, frame) -> None:
+    """Останавливает бота по сигналу завершения.
+
+    Исключение прерывает текущий запрос или ожидание, поэтому бот
+    завершается сразу, независимо от того, что отвечает сервер.
+    """
+    logger.info('Получен сигнал %s, бот останавливается', signum)
+    stop_event.set()
+    raise BotStopped(signum)
+
+
+def polling(bot: telegram.Bot) -> None:
+    """Опрашивает API и отправляет изменения статусов до остановки."""
     current_timestamp = int(time.time())
-    prev_message = None
-    while True:
+    recent_errors = OrderedDict()
+    delivered = set()
+    while not stop_event.is_set():
+        started = time.monotonic()
         try:
             response = get_api_answer(current_timestamp)
             homeworks = check_response(response)
             if homeworks:
-                status = parse_status(homeworks[0])
-                if status != prev_message:
-                    send_message(bot, status)
-                    prev_message = status
+                send_statuses(bot, homeworks, delivered, recent_errors)
+                current_timestamp = response.get(
+                    'current_date', current_timestamp
+                )
+                delivered.clear()
             else:
                 logger.debug('В ответе API отсутствуют новые статусы')
-            current_timestamp = int(time.time())
         except Exception as err:
-            message = f'Сбой в работе программы: {err}'
-            logger.error(message)
-            if message != prev_message:
-                send_message(bot, message)
-                prev_message = message
+            report_error(bot, err, recent_errors)
         finally:
-            time.sleep(RETRY_TIME)
+            stop_event.wait(
+                max(0, RETRY_TIME - (time.monotonic() - started))
+            )
+
+
+def main() -> None:
+    """Основная логика работы бота."""
+    tokens_ok, message = validate_env()
+    if not tokens_ok:
+        logger.critical(message)
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    try:
+        polling(bot)
+    except BotStopped:
+        logger.info('Бот остановлен')
+    finally:
+        SESSION.close()
 
 
 if __name__ == '__main__':
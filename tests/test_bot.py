@@ -1,5 +1,11 @@
+import json
 import os
+import signal
+import threading
+import time
+from collections import OrderedDict
 from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
 
 import requests
 import telegram
@@ -44,6 +50,7 @@ class MockResponseGET:
         )
         self.random_timestamp = random_timestamp
         self.status_code = http_status
+        self.headers = {}
 
     def json(self):
         data = {
@@ -52,6 +59,44 @@ class MockResponseGET:
         }
         return data
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
+
+class ServiceUnavailableHandler(BaseHTTPRequestHandler):
+    requests_count = 0
+    status = HTTPStatus.SERVICE_UNAVAILABLE
+    retry_after = None
+
+    def do_GET(self):
+        type(self).requests_count += 1
+        self.send_response(self.status)
+        if self.retry_after is not None:
+            self.send_header('Retry-After', str(self.retry_after))
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class HangingHandler(BaseHTTPRequestHandler):
+    delay = 1
+
+    def do_GET(self):
+        time.sleep(self.delay)
+
+    def log_message(self, *args):
+        pass
+
+
+def use_local_endpoint(monkeypatch, homework, url):
+    monkeypatch.setitem(
+        homework.SESSION.adapters, 'http://',
+        homework.SESSION.get_adapter('https://')
+    )
+    monkeypatch.setattr(homework, 'ENDPOINT', url)
+
 
 class MockTelegramBot:
 
@@ -186,7 +231,7 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -232,7 +277,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_500_response_get))
 
         import homework
 
@@ -315,7 +360,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -352,7 +397,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -400,7 +445,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -448,7 +493,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -484,7 +529,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_no_homeworks_response_get))
 
         import homework
 
@@ -525,7 +570,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -565,7 +610,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -599,7 +644,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_empty_response_get))
 
         import homework
 
@@ -626,7 +671,7 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', staticmethod(mock_response_get))
 
         import homework
 
@@ -640,3 +685,277 @@ class TestHomework:
                 f'Убедитесь, что в функции `{func_name}` обрабатываете ситуацию, '
                 'когда API возвращает код, отличный от 200'
             )
+
+    def test_get_api_answer_5xx_keeps_status_code(self, monkeypatch,
+                                                  current_timestamp,
+                                                  local_server):
+        import homework
+
+        use_local_endpoint(
+            monkeypatch, homework, local_server(ServiceUnavailableHandler)
+        )
+        cases = (
+            (HTTPStatus.SERVICE_UNAVAILABLE, None, 3),
+            (HTTPStatus.SERVICE_UNAVAILABLE, 30, 3),
+            (HTTPStatus.TOO_MANY_REQUESTS, 30, 1),
+        )
+        for status, retry_after, requests_count in cases:
+            monkeypatch.setattr(ServiceUnavailableHandler, 'status', status)
+            monkeypatch.setattr(
+                ServiceUnavailableHandler, 'retry_after', retry_after
+            )
+            ServiceUnavailableHandler.requests_count = 0
+            started = time.monotonic()
+            try:
+                homework.get_api_answer(current_timestamp)
+            except homework.ApiAnswerError as err:
+                assert str(status.value) in str(err), (
+                    'Код ответа API должен попадать в текст ошибки '
+                    'после исчерпания повторов'
+                )
+            else:
+                assert False, f'Ожидалась ApiAnswerError при ответе {status}'
+            assert time.monotonic() - started < 5, (
+                'Заголовок Retry-After не должен задерживать опрос API'
+            )
+            assert ServiceUnavailableHandler.requests_count == requests_count, (
+                'Запрос к API должен повторяться не более двух раз'
+            )
+
+    def test_get_api_answer_read_timeout(self, monkeypatch, current_timestamp,
+                                         local_server):
+        import homework
+
+        use_local_endpoint(monkeypatch, homework, local_server(HangingHandler))
+        monkeypatch.setattr(homework, 'READ_TIMEOUT', 0.2)
+        try:
+            homework.get_api_answer(current_timestamp)
+        except homework.ApiAnswerError as err:
+            assert str(err).startswith('Превышено время ожидания'), (
+                'Таймаут чтения должен давать отдельное сообщение об ошибке'
+            )
+            assert isinstance(err.__cause__, requests.exceptions.Timeout)
+        else:
+            assert False, 'Ожидалась ApiAnswerError при таймауте чтения'
+
+    def test_get_api_answer_if_none_match(self, monkeypatch, random_timestamp,
+                                          current_timestamp):
+        import homework
+
+        sent_headers = []
+
+        def mock_response_get(*args, **kwargs):
+            sent_headers.append(kwargs['headers'])
+            return MockResponseGET(
+                *args, random_timestamp=random_timestamp,
+                current_timestamp=kwargs['params']['from_date'], **kwargs
+            )
+
+        monkeypatch.setattr(requests.Session, 'get',
+                            staticmethod(mock_response_get))
+        monkeypatch.setattr(homework, 'api_cache', {
+            'from_date': current_timestamp, 'etag': '"abc"', 'response': {}
+        })
+        homework.get_api_answer(current_timestamp)
+        assert sent_headers[-1].get('If-None-Match') == '"abc"', (
+            'Для того же from_date нужно отправлять If-None-Match'
+        )
+        homework.get_api_answer(current_timestamp + 1)
+        assert 'If-None-Match' not in sent_headers[-1], (
+            'Для другого from_date If-None-Match отправлять нельзя'
+        )
+
+    def test_get_api_answer_not_modified(self, monkeypatch, random_timestamp,
+                                         current_timestamp):
+        import homework
+
+        def mock_304_response_get(*args, **kwargs):
+            return MockResponseGET(
+                *args, random_timestamp=random_timestamp,
+                current_timestamp=current_timestamp,
+                http_status=HTTPStatus.NOT_MODIFIED, **kwargs
+            )
+
+        monkeypatch.setattr(requests.Session, 'get',
+                            staticmethod(mock_304_response_get))
+        cached = {'homeworks': [], 'current_date': random_timestamp}
+        monkeypatch.setattr(homework, 'api_cache', {
+            'from_date': current_timestamp, 'etag': '"abc"',
+            'response': cached,
+        })
+        assert homework.get_api_answer(current_timestamp) is cached, (
+            'При ответе 304 нужно вернуть закешированный ответ'
+        )
+
+        monkeypatch.setattr(homework, 'api_cache', {
+            'from_date': None, 'etag': None, 'response': None
+        })
+        try:
+            homework.get_api_answer(current_timestamp)
+        except homework.ApiAnswerError:
+            pass
+        else:
+            assert False, 'Ответ 304 без закешированного ETag — это ошибка'
+
+    def test_main_advances_from_date(self, monkeypatch, random_timestamp):
+        import homework
+
+        homework_data = {'homework_name': 'hw123', 'status': 'approved'}
+        responses = [
+            {'homeworks': [homework_data], 'current_date': random_timestamp},
+            {'homeworks': [], 'current_date': random_timestamp + 100},
+            {'homeworks': [], 'current_date': random_timestamp + 200},
+        ]
+        timestamps = []
+
+        def mock_get_api_answer(current_timestamp):
+            timestamps.append(current_timestamp)
+            if len(timestamps) == len(responses):
+                homework.stop_event.set()
+            return responses[len(timestamps) - 1]
+
+        def mock_telegram_bot(*args, **kwargs):
+            return MockTelegramBot(*args, random_timestamp=random_timestamp,
+                                   **kwargs)
+
+        monkeypatch.setattr(telegram, 'Bot', mock_telegram_bot)
+        monkeypatch.setattr(signal, 'signal', lambda *args: None)
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        monkeypatch.setattr(homework, 'stop_event', threading.Event())
+        monkeypatch.setattr(homework, 'RETRY_TIME', 0)
+        monkeypatch.setattr(homework, 'SEND_INTERVAL', 0)
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        homework.main()
+        assert timestamps[1:] == [random_timestamp, random_timestamp], (
+            'После изменения статуса from_date должен сдвигаться '
+            'на current_date из ответа API'
+        )
+
+    def test_missing_keys_message(self):
+        import homework
+
+        try:
+            homework.check_response({'homeworks': []})
+        except KeyError as err:
+            assert str(err) == 'Отсутствуют ключи от API: current_date', (
+                'Сообщение об отсутствующих ключах должно перечислять '
+                'их без служебного оформления'
+            )
+        else:
+            assert False, 'Ожидалась ошибка об отсутствующем ключе'
+
+    def test_send_error_message_suppression(self, monkeypatch):
+        import homework
+
+        now = [1000.0]
+        sent = []
+        monkeypatch.setattr(homework.time, 'monotonic', lambda: now[0])
+        monkeypatch.setattr(homework, 'send_message',
+                            lambda bot, message: sent.append(message))
+        recent = OrderedDict()
+
+        homework.send_error_message(None, 'ошибка', recent)
+        now[0] += homework.SUPPRESS_WINDOW - 1
+        homework.send_error_message(None, 'ошибка', recent)
+        assert sent == ['ошибка'], (
+            'Повторная ошибка внутри SUPPRESS_WINDOW не должна отправляться'
+        )
+
+        now[0] += 1
+        homework.send_error_message(None, 'ошибка', recent)
+        assert sent == ['ошибка', 'ошибка'], (
+            'После SUPPRESS_WINDOW ошибку нужно отправить снова'
+        )
+
+        for number in range(homework.RECENT_MAX * 2):
+            homework.send_error_message(None, f'ошибка {number}', recent)
+        assert len(recent) == homework.RECENT_MAX, (
+            'Число запомненных ошибок не должно превышать RECENT_MAX'
+        )
+
+    def test_send_statuses_partial_failure(self, monkeypatch):
+        import homework
+
+        sent = []
+
+        class FlakyBot:
+            fail = True
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if self.fail and sent:
+                    raise telegram.error.RetryAfter(1)
+                sent.append(text)
+
+        monkeypatch.setattr(homework, 'SEND_INTERVAL', 0)
+        homeworks = [
+            {'homework_name': 'hw2', 'status': 'approved'},
+            {'homework_name': 'hw1', 'status': 'reviewing'},
+        ]
+        bot = FlakyBot()
+        delivered = set()
+        try:
+            homework.send_statuses(bot, homeworks, delivered, OrderedDict())
+        except homework.SendMessageError:
+            pass
+        else:
+            assert False, 'Ожидалась ошибка отправки второго сообщения'
+        bot.fail = False
+        homework.send_statuses(bot, homeworks, delivered, OrderedDict())
+        assert len(sent) == 2 and 'hw1' in sent[0] and 'hw2' in sent[1], (
+            'Уже доставленные статусы не должны отправляться повторно, '
+            'остальные должны уйти от старых к новым'
+        )
+
+    def test_send_statuses_skips_bad_entry(self, monkeypatch):
+        import homework
+
+        sent = []
+        monkeypatch.setattr(homework, 'SEND_INTERVAL', 0)
+        monkeypatch.setattr(homework, 'send_message',
+                            lambda bot, message: sent.append(message))
+        homeworks = [
+            {'homework_name': 'hw2', 'status': 'unknown'},
+            {'homework_name': 'hw1', 'status': 'approved'},
+        ]
+        homework.send_statuses(None, homeworks, set(), OrderedDict())
+        assert len(sent) == 2, (
+            'Работа с ошибкой должна попасть в отчёт об ошибке, '
+            'не блокируя отправку остальных статусов'
+        )
+        assert sent[0].startswith('Изменился статус проверки работы "hw1"')
+        assert sent[1].startswith('Сбой в работе программы')
+
+    def test_main_stops_during_request(self, monkeypatch, random_timestamp,
+                                       local_server):
+        import homework
+
+        def mock_telegram_bot(*args, **kwargs):
+            return MockTelegramBot(*args, random_timestamp=random_timestamp,
+                                   **kwargs)
+
+        monkeypatch.setattr(HangingHandler, 'delay', 5)
+        use_local_endpoint(monkeypatch, homework, local_server(HangingHandler))
+        monkeypatch.setattr(telegram, 'Bot', mock_telegram_bot)
+        monkeypatch.setattr(homework, 'stop_event', threading.Event())
+        monkeypatch.setattr(homework, 'READ_TIMEOUT', 30)
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        handlers = {
+            sig: signal.getsignal(sig) for sig in (signal.SIGTERM,
+                                                   signal.SIGINT)
+        }
+        timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM))
+        started = time.monotonic()
+        try:
+            timer.start()
+            homework.main()
+        finally:
+            timer.cancel()
+            for sig, handler in handlers.items():
+                signal.signal(sig, handler)
+        assert time.monotonic() - started < 3, (
+            'SIGTERM должен прерывать запрос к API, не дожидаясь ответа'
+        )